@@ -1,6 +1,8 @@
 import io
 import logging
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Tuple
 
 import boto3
 import configargparse
@@ -45,6 +47,12 @@ def build_arg_parser():
         default=2.0,
         help="the minimum cost of a VPC before outputting",
     )
+    g.add(
+        "--max-workers",
+        type=int,
+        default=16,
+        help="the maximum number of regions to scan in parallel",
+    )
     g = p.add_argument_group("Output")
     g.add("--output-csv", help="write the information in CSV format to this file")
     g.add(
@@ -53,6 +61,24 @@ def build_arg_parser():
     return p
 
 
+def scan_region(session, reg: str, args) -> Tuple[Optional[Region], Optional[str]]:
+    # Hand back whatever was scanned before an error, along with its message
+    try:
+        region = Region(session, reg, args)
+    except ClientError as e:
+        return None, e.response["Error"]["Message"]
+
+    try:
+        vpc_ids = [v["VpcId"] for v in region.context.get_all_vpcs()]
+
+        for vpc_id in vpc_ids:
+            region.add_vpc(vpc_id)
+    except ClientError as e:
+        return region, e.response["Error"]["Message"]
+
+    return region, None
+
+
 if __name__ == "__main__":
     p = build_arg_parser()
     args = p.parse_args()
@@ -75,28 +101,32 @@ if __name__ == "__main__":
         if args.region:
             to_scan = [args.region]
 
-        for reg in to_scan:
-            clear = " " * 80
-            try:
-                region = Region(session, reg, args)
-                regions.append(region)
+        clear = " " * 80
+        scanned = {}
+        workers = max(1, min(args.max_workers, len(to_scan)))
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            futures = {ex.submit(scan_region, session, r, args): r for r in to_scan}
+            for future in as_completed(futures):
+                reg = futures[future]
+                region, msg = future.result()
+                if region:
+                    scanned[reg] = region
 
-                vpcs = list(region.context.ec2.vpcs.filter(Filters=[]))
-                for vpc in vpcs:
+                if msg:
+                    sys.stdout.write(f"\r{clear}\r{reg}\t{msg}")
+                else:
                     sys.stdout.write(
-                        f"\r{clear}\rScanning region: {reg}\tVPC: {vpc.id}"
+                        f"\r{clear}\rScanned region: {reg}\tVPCs: {len(region.vpcs)}"
                     )
-                    region.add_vpc(vpc.id)
 
-            except ClientError as e:
-                sys.stdout.write(f"\r{clear}\r{reg}\t{e.response['Error']['Message']}")
+        # Keep the output in the same order as the regions were requested
+        regions.extend(scanned[r] for r in to_scan if r in scanned)
         sys.stdout.write(f"\r{clear}\rFinished scanning\n")
 
     if args.output_csv:
         with io.open(args.output_csv, "w") as f:
             for r in regions:
                 r.to_csv("", f)
-                f.flush()
     elif args.output_gv:
         for r in regions:
             r.to_graphviz(args.output_gv, args.cost_threshhold)
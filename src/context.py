@@ -1,4 +1,20 @@
-from dataclasses import dataclass
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Callable, Dict, List
+
+from botocore.config import Config
+from src.utils import paginate
+
+# boto3 sessions are not thread-safe when creating clients
+_CLIENT_LOCK = threading.Lock()
+
+# Threads per pool when scanning a VPC, the describe pool nests at most one more
+MAX_WORKERS = 8
+
+# Enough connections for both pools to share a client without churning
+_CLIENT_CONFIG = Config(max_pool_connections=2 * MAX_WORKERS)
 
 
 @dataclass
@@ -8,19 +24,121 @@ class Context:
     profile: str
     options: any
     region: str
-    vpc_client: any
-    elbV2_client: any
-    elb_client: any
-    lambda_client: any
-    eks_client: any
-    asg_client: any
-    rds_client: any
-    ec2: any
-    route53: any
+    session: any
+    _cache: Dict[tuple, Any] = field(default_factory=dict, repr=False)
+    _cache_locks: Dict[tuple, threading.Lock] = field(default_factory=dict, repr=False)
+    _cache_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    # Clients are created on first use, loading a service model is not free
+
+    def _client(self, service_name: str):
+        with _CLIENT_LOCK:
+            return self.session.client(
+                service_name, region_name=self.region, config=_CLIENT_CONFIG
+            )
+
+    @cached_property
+    def vpc_client(self):
+        return self._client("ec2")
+
+    @cached_property
+    def elbV2_client(self):
+        return self._client("elbv2")
+
+    @cached_property
+    def elb_client(self):
+        return self._client("elb")
+
+    @cached_property
+    def lambda_client(self):
+        return self._client("lambda")
+
+    @cached_property
+    def eks_client(self):
+        return self._client("eks")
+
+    @cached_property
+    def asg_client(self):
+        return self._client("autoscaling")
+
+    @cached_property
+    def rds_client(self):
+        return self._client("rds")
+
+    @cached_property
+    def route53(self):
+        return self._client("route53")
+
+    # Region wide listings, shared by every VPC scanned with this context
+
+    def _memoize(self, key: tuple, build: Callable[[], Any]) -> Any:
+        # One lock per key, so different listings are fetched side by side
+        with self._cache_lock:
+            lock = self._cache_locks.setdefault(key, threading.Lock())
+
+        with lock:
+            if key not in self._cache:
+                self._cache[key] = build()
+
+        return self._cache[key]
+
+    def _describe_all(
+        self, client_name: str, operation: str, result_key: str, page_size: int = 1000
+    ) -> List[dict]:
+        return self._memoize(
+            (client_name, operation),
+            lambda: paginate(
+                getattr(self, client_name),
+                operation,
+                result_key,
+                PaginationConfig={"PageSize": page_size},
+            ),
+        )
+
+    def get_all_vpcs(self) -> List[dict]:
+        return self._describe_all("vpc_client", "describe_vpcs", "Vpcs")
+
+    def get_all_subnets(self) -> List[dict]:
+        return self._describe_all("vpc_client", "describe_subnets", "Subnets")
+
+    def get_all_security_groups(self) -> List[dict]:
+        return self._describe_all(
+            "vpc_client", "describe_security_groups", "SecurityGroups"
+        )
+
+    def get_all_functions(self) -> List[dict]:
+        return self._describe_all("lambda_client", "list_functions", "Functions", 50)
+
+    def get_all_target_groups(self) -> List[dict]:
+        return self._describe_all(
+            "elbV2_client", "describe_target_groups", "TargetGroups", 400
+        )
+
+    # Not a cached_property, its lock is shared by every Context before 3.12
+    @property
+    def subnet_vpc_ids(self) -> Dict[str, str]:
+        return self._memoize(
+            ("subnet_vpc_ids",),
+            lambda: {s["SubnetId"]: s["VpcId"] for s in self.get_all_subnets()},
+        )
+
+    @property
+    def target_groups_by_lb(self) -> Dict[str, List[dict]]:
+        def build():
+            result = defaultdict(list)
+            for tg in self.get_all_target_groups():
+                for lb in tg["LoadBalancerArns"]:
+                    result[lb].append(tg)
+            return result
+
+        return self._memoize(("target_groups_by_lb",), build)
 
 
 def build_context(session, region: str, options: any) -> Context:
-    identity = session.client("sts").get_caller_identity()
+    with _CLIENT_LOCK:
+        sts = session.client("sts")
+
+    identity = sts.get_caller_identity()
 
     return Context(
         identity["UserId"],
@@ -28,13 +146,5 @@ def build_context(session, region: str, options: any) -> Context:
         session.profile_name,
         options,
         region,
-        session.client("ec2", region_name=region),
-        session.client("elbv2", region_name=region),
-        session.client("elb", region_name=region),
-        session.client("lambda", region_name=region),
-        session.client("eks", region_name=region),
-        session.client("autoscaling", region_name=region),
-        session.client("rds", region_name=region),
-        session.resource("ec2", region_name=region),
-        session.client("route53", region_name=region),
+        session,
     )
@@ -1,13 +1,17 @@
+import logging
 import os
 import os.path
+import socket
+import struct
+import subprocess
 from collections import Counter, defaultdict
 from dataclasses import dataclass, field
-from itertools import product
+from functools import lru_cache
 from typing import Dict, List, Set
 
 from jinja2 import Environment, DictLoader
-from src.service import NetworkInterface, ServiceInstance, Subnet
-from src.vpc import Relation, VPC
+from src.service import ServiceInstance, Subnet
+from src.vpc import VPC
 
 REPLACE_TABLE = str.maketrans(
     {
@@ -18,10 +22,12 @@ REPLACE_TABLE = str.maketrans(
     }
 )
 
-TOP_SVC = ["ASG", "ELBv1", "ELBv2", "EPT-GWLB", "VPGW", "TG", "EKS", "Lambda", "EPT-I"]
-SUBNET_SVC = ["EC2", "ENI", "NAT"]
-BOTTOM_SVC = ["RDS"]
-NW_SVC = ["ACL", "EPT-GW", "IGW", "RTB", "PEER", "SG"]
+TOP_SVC = frozenset(
+    ["ASG", "ELBv1", "ELBv2", "EPT-GWLB", "VPGW", "TG", "EKS", "Lambda", "EPT-I"]
+)
+SUBNET_SVC = frozenset(["EC2", "ENI", "NAT"])
+BOTTOM_SVC = frozenset(["RDS"])
+NW_SVC = frozenset(["ACL", "EPT-GW", "IGW", "RTB", "PEER", "SG"])
 
 LEVELS = [
     ["R53"],
@@ -45,24 +51,28 @@ LEVELS = [
     ["EPT-GW", "PEER", "IGW"],
 ]
 
-NETWORK = [
-    "ACL",
-    "ELBv1",
-    "ELBv2",
-    "ENI",
-    "EPT-I",
-    "EPT-GWLB",
-    "HZ",
-    "IGW",
-    "NAT",
-    "PEER",
-    "RTB",
-    "SG",
-    "TG",
-    "VPGW",
-]
-STORAGE = ["EPT-GW", "RDS"]
-COMPUTE = ["ASG", "EC2", "Lambda", "EKS"]
+_LEVEL = {t: l for l, types in enumerate(LEVELS) for t in types}
+
+NETWORK = frozenset(
+    [
+        "ACL",
+        "ELBv1",
+        "ELBv2",
+        "ENI",
+        "EPT-I",
+        "EPT-GWLB",
+        "HZ",
+        "IGW",
+        "NAT",
+        "PEER",
+        "RTB",
+        "SG",
+        "TG",
+        "VPGW",
+    ]
+)
+STORAGE = frozenset(["EPT-GW", "RDS"])
+COMPUTE = frozenset(["ASG", "EC2", "Lambda", "EKS"])
 
 TEMPLATE = """
 digraph G {
@@ -163,19 +173,17 @@ class GVAZ:
 # Helper Methods
 
 
-def cidr_sort(svc: Subnet):
-    ip = svc.cidr.split("/")[0]
-    return [int(x) for x in ip.split(".")]
+def cidr_sort(svc: Subnet) -> int:
+    ip = svc.cidr.partition("/")[0]
+    return struct.unpack("!I", socket.inet_aton(ip))[0]
 
 
 def level(service_name: str) -> int:
-    for l, types in enumerate(LEVELS):
-        for t in types:
-            if t == service_name:
-                return l
+    result = _LEVEL.get(service_name)
+    if result is None:
+        logging.warning("%s is not found", service_name)
 
-    print(service_name, "is not found")
-    return None
+    return result
 
 
 def graphviz_color(service: str) -> str:
@@ -188,6 +196,7 @@ def graphviz_color(service: str) -> str:
     return "orange"
 
 
+@lru_cache(maxsize=None)
 def graphviz_id(s: str) -> str:
     return s.translate(REPLACE_TABLE)
 
@@ -235,7 +244,7 @@ def node(svc: ServiceInstance):
     return f"{graphviz_id(svc.id)} [{s_attrs}]"
 
 
-def edge(source: ServiceInstance, target: ServiceInstance, vpc: VPC):
+def edge(source: ServiceInstance, target: ServiceInstance):
     if source.service_name == "SUBN":
         return None
 
@@ -256,40 +265,54 @@ def edge(source: ServiceInstance, target: ServiceInstance, vpc: VPC):
         attrs["style"] = "invis"
 
     # Route table
-    if source.service_name == "ENI" and target.service_name == "RTB":
-        rel = Relation(source.id, target.id)
-        if rel not in vpc.relations:
-            attrs["weight"] = 10
-            attrs["style"] = "invis"
-    elif target.service_name == "RTB":
+    if target.service_name == "RTB":
         attrs["color"]: "mediumpurple"
 
     s_attrs = " ".join([f'{k}="{v}"' for k, v in attrs.items()])
     return f"{ graphviz_id(source.id) } -> { graphviz_id(target.id) } [{s_attrs}]"
 
 
+# Set up the Jinja environment once, the template never changes
+_JINJA_ENV = Environment(
+    loader=DictLoader({"template": TEMPLATE}), trim_blocks=True, lstrip_blocks=True
+)
+_JINJA_ENV.filters["graphviz_id"] = graphviz_id
+_TEMPLATE = _JINJA_ENV.get_template("template")
+
 # -----------------------------------------------------------------------------
 # Main methods
 
 
 def render(full_path: str):
     gv_dir, file_name = os.path.split(full_path)
-    cmd = f"cd {gv_dir} && dot -Tpng -x -O {file_name}"
-    os.system(cmd)
+    try:
+        subprocess.run(["dot", "-Tpng", "-x", "-O", file_name], cwd=gv_dir, check=False)
+    except OSError as e:
+        # Keep going, the .gv file is still there to render by hand
+        logging.warning("Could not render %s: %s", full_path, e)
 
 
 def to_graphviz(vpc: VPC, stream):
+    # Look up the per-service values once, the loops below index into these
+    svcs = list(vpc.services)
+    ids = [v.id for v in svcs]
+    names = [v.service_name for v in svcs]
+    levels = {n: level(n) for n in set(names)}
+    lvls = [levels[n] for n in names]
+    rendered = [node(v) for v in svcs]
+    by_key = {v.instance_name: i for i, v in enumerate(svcs)}
+    by_id = {_id: i for i, _id in enumerate(ids)}
+
     # Add all edge nodes to the connected set
-    connected = set(
-        [x.source for x in vpc.relations] + [x.target for x in vpc.relations]
-    )
+    connected = set()
+    for src, trg in vpc.relations:
+        connected.add(src)
+        connected.add(trg)
 
     # Ensure all Storage & Compute services are included
-    for v in vpc.services:
-        if v.service_name in STORAGE or v.service_name in COMPUTE:
-            connected.add(v.id)
-        if v.service_name == "HZ":
-            connected.add(v.id)
+    for _id, sn in zip(ids, names):
+        if sn in STORAGE or sn in COMPUTE or sn == "HZ":
+            connected.add(_id)
 
     # Find if there are single AZ or single subnet services
     az_tally = Counter()
@@ -299,17 +322,15 @@ def to_graphviz(vpc: VPC, stream):
         for k in availzone.subnet_ids:
             sn_tally.update(vpc.subnets[k])
 
-    single_subnet = set([k for k, v in sn_tally.items() if v == 1])
-    single_az = set(
-        [k for k, v in az_tally.items() if v == 1 and k not in single_subnet]
-    )
+    single_subnet = {k for k, v in sn_tally.items() if v == 1}
+    single_az = {k for k, v in az_tally.items() if v == 1 and k not in single_subnet}
 
     # Accidently includes services in several SN and AZs
     # for k, v in sn_tally.items():
     #     if v > 1 and k not in az_tally:
     #         single_az.add(k)
 
-    contained = single_subnet.union(single_az)
+    contained = single_subnet | single_az
 
     start_vpc = level("VPC")
     end_top = level("SUBN")
@@ -320,22 +341,23 @@ def to_graphviz(vpc: VPC, stream):
     bottom_services: List[ServiceInstance] = []
     nw_services: List[ServiceInstance] = []
     ranks: Dict[str, list] = defaultdict(list)
-    enis: List[NetworkInterface] = []
-    rtbs: List[ServiceInstance] = []
 
     # Route the services to the appropriate area
-    for v in vpc.services:
-        l = level(v.service_name)
-        nv = node(v)
-        display_outside_sn = v.id in connected and v.id not in contained
+    for i in range(len(svcs)):
+        _id = ids[i]
+        sn = names[i]
+        l = lvls[i]
+        nv = rendered[i]
+        in_conn = _id in connected
+        display_outside_sn = in_conn and _id not in contained
 
         if l < start_vpc:
             route53_services.append(nv)
-        elif l < end_top and v.id not in contained:
+        elif l < end_top and _id not in contained:
             top_services.append(nv)
-        elif v.service_name in BOTTOM_SVC and display_outside_sn:
+        elif sn in BOTTOM_SVC and display_outside_sn:
             bottom_services.append(nv)
-        elif v.service_name in NW_SVC and display_outside_sn:
+        elif sn in NW_SVC and display_outside_sn:
             nw_services.append(nv)
         # else:
         #     print(
@@ -346,13 +368,8 @@ def to_graphviz(vpc: VPC, stream):
         #         v.id in single_az
         #     )
 
-        if v.service_name not in ["SUBN"] and v.id in connected:
-            ranks[v.service_name].append(v.id)
-
-        if v.service_name == "ENI" and v.id in connected:
-            enis.append(v.id)
-        if v.service_name == "RTB" and v.id in connected:
-            rtbs.append(v.id)
+        if in_conn and sn != "SUBN":
+            ranks[sn].append(_id)
 
     azs = []
     az_i = 0
@@ -366,15 +383,18 @@ def to_graphviz(vpc: VPC, stream):
         az.top_services: List[ServiceInstance] = []
         az.bottom_services: List[ServiceInstance] = []
 
-        # Route the services to the appropriate area
-        for v in vpc.services:
-            l = level(v.service_name)
-            nv = node(v)
-            display_in_az = v.id in availzone.service_ids and v.id in single_az
+        # Route the services that only live in this AZ
+        for sid in sorted(availzone.service_ids):
+            if sid not in single_az or sid not in by_id:
+                continue
 
-            if l < end_top and display_in_az:
+            i = by_id[sid]
+            l = lvls[i]
+            nv = rendered[i]
+
+            if l < end_top:
                 az.top_services.append(nv)
-            if l > end_subnet and display_in_az:
+            if l > end_subnet:
                 az.bottom_services.append(nv)
 
         subnet_instances: List[Subnet] = [vpc[k] for k in availzone.subnet_ids]
@@ -391,26 +411,19 @@ def to_graphviz(vpc: VPC, stream):
                 if x in connected and x in single_subnet
             ]
             for x in sorted(inside, key=lambda x: (x.service_name, x.instance_name)):
-                sn.services.append(node(x))
+                sn.services.append(rendered[by_key[x.instance_name]])
 
-    # Output edges
+    # Output edges, relations are already unique and the result is sorted below
+    get = vpc.__getitem__
     raw = [
-        edge(vpc[x.source], vpc[x.target], vpc)
-        for x in sorted(set(vpc.relations))
-        if x.source in vpc and x.target in vpc
+        edge(get(src), get(trg))
+        for src, trg in vpc.relations
+        if src in vpc and trg in vpc
     ]
 
-    # Add ENI to RTB edges
-    for eni, rtb in product(enis, rtbs):
-        raw.append(edge(vpc[eni], vpc[rtb], vpc))
-
     edges = sorted([x for x in raw if x is not None])
 
-    # Set up the Jinja environment
-    JinjaEnv = Environment(loader=DictLoader({"template": TEMPLATE}))
-    JinjaEnv.filters.update({"graphviz_id": graphviz_id})
-
-    gv_out = JinjaEnv.get_template("template").render(
+    gv_out = _TEMPLATE.render(
         {
             "vpc_name": f"{vpc.name}\\n{vpc.id}\\n{vpc.cidr_block}",
             "route53_services": route53_services,
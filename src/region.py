@@ -1,6 +1,7 @@
 import io
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 from src.context import build_context
@@ -68,24 +69,38 @@ class Region:
 
     def to_csv(self, prefix, stream):
         fwd = f"{prefix}{self.context.profile}\t{self.name}\t"
+
+        # Collect the whole region and hand it to the stream in one write
+        buf = io.StringIO()
         for v in self.vpcs:
-            v.to_csv(fwd, stream)
+            v.to_csv(fwd, buf)
+        stream.write(buf.getvalue())
 
     def to_graphviz(self, directory, cost_threshhold: float):
+        to_render = []
         for v in self.vpcs:
             if v.cost_per_month() < cost_threshhold:
-                logging.warn("%s is below the cost threshhold. Skipping.", v.name)
+                logging.warning("%s is below the cost threshhold. Skipping.", v.name)
                 continue
+            to_render.append(v)
 
-            full_dir = os.path.join(directory, self.context.account)
-            file_title = f"{v.id}_{v.name}".translate(FIX_FILE_NAME)
+        if not to_render:
+            return
+
+        full_dir = os.path.join(directory, self.context.account)
+        os.makedirs(full_dir, exist_ok=True)
 
-            if not os.path.exists(full_dir):
-                os.mkdir(full_dir)
+        paths = []
+        for v in to_render:
+            file_title = f"{v.id}_{v.name}".translate(FIX_FILE_NAME)
             full_path = os.path.join(full_dir, f"{file_title}.gv")
 
             with io.open(full_path, "w") as f:
                 to_graphviz(v, f)
                 f.flush()
 
-            render(full_path)
+            paths.append(full_path)
+
+        # Each dot invocation is independent, so render them side by side
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+            list(ex.map(render, paths))
@@ -1,8 +1,40 @@
 import logging
 from dataclasses import dataclass
+from functools import cached_property
+from itertools import chain
 from typing import Tuple
 
-from src.utils import parse_arn
+from src.utils import arn_resource
+
+EC2_COST_PER_TYPE = {
+    "m3.medium": 0.067,
+    "m4.2xlarge": 0.40,
+    "m5.large": 0.096,
+    "t2.2xlarge": 0.3712,
+    "t2.large": 0.0928,
+    "t2.medium": 0.0464,
+    "t2.micro": 0.0116,
+    "t2.small": 0.023,
+    "t2.xlarge": 0.1856,
+    "t3.small": 0.0208,
+    "t3a.large": 0.0752,
+    "t3a.xlarge": 0.1504,
+}
+
+RDS_COST_PER_TYPE = {
+    "db.m3.2xlarge": 1.55,
+    "db.m5.2xlarge": 0.712,
+    "db.m5.xl": 0.356,
+    "db.m5.xlarge": 0.342,
+    "db.r5.large": 0.25,
+    "db.r5.xl": 0.50,
+    "db.r5.xlarge": 0.48,
+    "db.t2.medium": 0.073,
+    "db.t2.micro": 0.017,
+    "db.t2.small": 0.036,
+    "db.t3.medium": 0.072,
+    "db.t3.small": 0.036,
+}
 
 
 @dataclass
@@ -11,7 +43,7 @@ class ServiceInstance:
     service_name: str
     instance_name: str
 
-    def to_csv(self, prefix, stream):
+    def csv_row(self, prefix) -> str:
         cells = "\t".join(
             [
                 self.service_name,
@@ -21,22 +53,21 @@ class ServiceInstance:
                 f"{self.cost_per_month:,.2f}",
             ]
         )
-        stream.write(f"{prefix}{cells}\n")
+        return f"{prefix}{cells}\n"
 
     @property
     def cost_per_month(self):
         return 0
 
-    @property
+    @cached_property
     def id(self):
         # It's an ARN, shorten
-        if self.instance_name.startswith("arn"):
-            elems = parse_arn(self.instance_name)
-            return elems["resource"]
+        if self.instance_name.startswith("arn:"):
+            return arn_resource(self.instance_name)
 
         return self.instance_name
 
-    @property
+    @cached_property
     def label(self):
         result = self.instance_name
 
@@ -46,12 +77,11 @@ class ServiceInstance:
 
         return result
 
-    @property
+    @cached_property
     def name(self):
         # It's an ARN, shorten
-        if self.instance_name.startswith("arn"):
-            elems = parse_arn(self.instance_name)
-            return elems["resource"]
+        if self.instance_name.startswith("arn:"):
+            return arn_resource(self.instance_name)
 
         result = self.instance_name
 
@@ -61,7 +91,7 @@ class ServiceInstance:
 
         return result
 
-    @property
+    @cached_property
     def type_info(self):
         return ""
 
@@ -69,7 +99,7 @@ class ServiceInstance:
         return f"{self.service_name} - {self.instance_name} - {self.type_info}"
 
     def __hash__(self) -> int:
-        return hash(str(self))
+        return hash((self.service_name, self.instance_name))
 
     def __eq__(self, other) -> bool:
         return (
@@ -88,21 +118,7 @@ class EC2Instance(ServiceInstance):
 
     @property
     def cost_per_month(self):
-        COST_PER_TYPE = {
-            "m3.medium": 0.067,
-            "m4.2xlarge": 0.40,
-            "m5.large": 0.096,
-            "t2.2xlarge": 0.3712,
-            "t2.large": 0.0928,
-            "t2.medium": 0.0464,
-            "t2.micro": 0.0116,
-            "t2.small": 0.023,
-            "t2.xlarge": 0.1856,
-            "t3.small": 0.0208,
-            "t3a.large": 0.0752,
-            "t3a.xlarge": 0.1504,
-        }
-        return COST_PER_TYPE.get(self.instance_type, 0.00) * 24 * 30
+        return EC2_COST_PER_TYPE.get(self.instance_type, 0.00) * 24 * 30
 
     @property
     def type_info(self):
@@ -196,21 +212,7 @@ class RdsInstance(ServiceInstance):
 
     @property
     def cost_per_month(self):
-        COST_PER_TYPE = {
-            "db.m3.2xlarge": 1.55,
-            "db.m5.2xlarge": 0.712,
-            "db.m5.xl": 0.356,
-            "db.m5.xlarge": 0.342,
-            "db.r5.large": 0.25,
-            "db.r5.xl": 0.50,
-            "db.r5.xlarge": 0.48,
-            "db.t2.medium": 0.073,
-            "db.t2.micro": 0.017,
-            "db.t2.small": 0.036,
-            "db.t3.medium": 0.072,
-            "db.t3.small": 0.036,
-        }
-        return COST_PER_TYPE.get(self.instance_type, 0.00) * 24 * 30
+        return RDS_COST_PER_TYPE.get(self.instance_type, 0.00) * 24 * 30
 
     @property
     def type_info(self):
@@ -229,20 +231,28 @@ class SecurityGroup(ServiceInstance):
     @property
     def relationships(self) -> Tuple[str, str]:
         me = self.details["GroupId"]
+        ingress = chain.from_iterable(
+            p["UserIdGroupPairs"] for p in self.details["IpPermissions"]
+        )
+        egress = chain.from_iterable(
+            p["UserIdGroupPairs"] for p in self.details["IpPermissionsEgress"]
+        )
 
-        for ingress in self.details["IpPermissions"]:
-            for pairs in ingress["UserIdGroupPairs"]:
-                for attr in ["GroupId", "VpcPeeringConnectionId"]:
-                    value = pairs.get(attr, None)
-                    if value:
-                        yield (value, me)
-
-        for egress in self.details["IpPermissionsEgress"]:
-            for pairs in egress["UserIdGroupPairs"]:
-                for attr in ["GroupId", "VpcPeeringConnectionId"]:
-                    value = pairs.get(attr, None)
-                    if value:
-                        yield (me, value)
+        for pairs in ingress:
+            group = pairs.get("GroupId")
+            if group:
+                yield (group, me)
+            peering = pairs.get("VpcPeeringConnectionId")
+            if peering:
+                yield (peering, me)
+
+        for pairs in egress:
+            group = pairs.get("GroupId")
+            if group:
+                yield (me, group)
+            peering = pairs.get("VpcPeeringConnectionId")
+            if peering:
+                yield (me, peering)
 
 
 class Subnet(ServiceInstance):
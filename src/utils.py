@@ -17,3 +17,25 @@ def parse_arn(arn):
     else:
         result["resourcetype"], result["resource"] = elements[5].split("/", maxsplit=1)
     return result
+
+
+def arn_resource(arn):
+    # Same as parse_arn(arn)["resource"], without building the dict
+    elements = arn.split(":")
+    if len(elements) == 7:
+        return elements[6]
+
+    tail = elements[5]
+    i = tail.find("/")
+    return tail[i + 1 :] if i != -1 else tail
+
+
+def paginate(client, operation, result_key, **kwargs):
+    # Gather result_key from every page, not just the first one
+    return list(search(client, operation, f"{result_key}[]", **kwargs))
+
+
+def search(client, operation, expression, **kwargs):
+    # Stream the JMESPath expression's matches across every page
+    paginator = client.get_paginator(operation)
+    return paginator.paginate(**kwargs).search(expression)
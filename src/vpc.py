@@ -1,10 +1,12 @@
 import logging
-from collections import defaultdict, namedtuple
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Set, Iterable
+from typing import Any, Dict, Set, Iterable, Tuple
 
 from botocore.exceptions import ClientError
-from src.context import Context
+from src.context import MAX_WORKERS, Context
 from src.service import (
     AutoServiceGroup,
     EC2Instance,
@@ -21,21 +23,33 @@ from src.service import (
     TargetGroup,
     VpcEndpoint,
 )
+from src.utils import paginate, search
 
 # logger config
 logger = logging.getLogger()
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 
+# Route targets, the gateway routes into the table, the rest are routed to
+ROUTE_KEYS_IN = ("GatewayId",)
+ROUTE_KEYS_OUT = (
+    "EgressOnlyInternetGatewayId",
+    "InstanceId",
+    "NatGatewayId",
+    "TransitGatewayId",
+    "LocalGatewayId",
+    "CarrierGatewayId",
+    "NetworkInterfaceId",
+    "VpcPeeringConnectionId",
+)
+
 # -----------------------------------------------------------------------------
 # Helper Classes
 
-Relation = namedtuple("Relation", ["source", "target"])
 
-
-@dataclass
+@dataclass(slots=True)
 class AvailabilityZone:
-    service_ids: List[str] = field(default_factory=list)
-    subnet_ids: List[str] = field(default_factory=list)
+    service_ids: Set[str] = field(default_factory=set)
+    subnet_ids: Set[str] = field(default_factory=set)
 
 
 # -----------------------------------------------------------------------------
@@ -49,9 +63,14 @@ class VPC(object):
         self.name: str = ""
         self.details: Dict[str, Any] = {}
         self._services: Dict[str, ServiceInstance] = {}
-        self.relations: Set[Relation] = set()
+        self._adj: Dict[str, Set[str]] = defaultdict(set)
         self.azs: Dict[str, AvailabilityZone] = defaultdict(AvailabilityZone)
-        self.subnets: Dict[str, List[str]] = defaultdict(list)
+        self.subnets: Dict[str, Set[str]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+        # Shared by the describe calls that filter on this VPC
+        self._vpc_filter = [{"Name": "vpc-id", "Values": [id]}]
+        self._attachment_filter = [{"Name": "attachment.vpc-id", "Values": [id]}]
 
     def __getitem__(self, key: str) -> ServiceInstance:
         return self._services.get(key, None)
@@ -64,25 +83,62 @@ class VPC(object):
         for v in self._services.values():
             yield v
 
+    @property
+    def relations(self) -> Iterable[Tuple[str, str]]:
+        for src, targets in self._adj.items():
+            for trg in targets:
+                yield (src, trg)
+
     @property
     def availability_zones(self) -> Iterable[AvailabilityZone]:
         for v in self.azs.values():
             yield v
 
+    # The describe methods run concurrently, so every write to the shared
+    # collections goes through self._lock
+
+    def _add_service(self, _id: str, factory, *args) -> ServiceInstance:
+        # Only build the instance the first time the id is seen
+        with self._lock:
+            service = self._services.get(_id)
+            if service is None:
+                service = self._services[_id] = factory(*args)
+        return service
+
+    def _set_service(self, _id: str, service: ServiceInstance):
+        # Replaces whatever another describe method stored for the id
+        with self._lock:
+            self._services[_id] = service
+
     def _add_relation(self, src: str, trg: str):
-        if src is None or trg is None:
-            return
-        self.relations.add(Relation(src, trg))
+        if src and trg:
+            with self._lock:
+                self._adj[src].add(trg)
+
+    def _add_to_subnet(self, subnet_id: str, _id: str):
+        with self._lock:
+            self.subnets[subnet_id].add(_id)
+
+    def _add_to_az(self, name: str, _id: str):
+        with self._lock:
+            self.azs[name].service_ids.add(_id)
+
+    def _add_subnet_to_az(self, name: str, subnet_id: str):
+        with self._lock:
+            self.azs[name].subnet_ids.add(subnet_id)
 
     # ----------------------------------------------------------------------------
     # Describe Services
 
     def describe_asgs(self, context: Context):
-        asgs = context.asg_client.describe_auto_scaling_groups()["AutoScalingGroups"]
+        asgs = paginate(
+            context.asg_client, "describe_auto_scaling_groups", "AutoScalingGroups"
+        )
+
         for asg in asgs:
             if self.asg_in_vpc(asg, context):
                 _id = asg["AutoScalingGroupName"]
-                self._services[_id] = AutoServiceGroup(asg, "ASG", _id)
+                self._add_service(_id, AutoServiceGroup, asg, "ASG", _id)
 
                 # Add relations
                 for lb in asg["LoadBalancerNames"]:
@@ -90,194 +146,232 @@ class VPC(object):
                 for x in asg["Instances"]:
                     self._add_relation(_id, x["InstanceId"])
                 for az in asg["AvailabilityZones"]:
-                    self.azs[az].service_ids.append(_id)
+                    self._add_to_az(az, _id)
 
-    def asg_in_vpc(self, asg, context):
-        subnets_list = asg["VPCZoneIdentifier"].split(",")
-        for subnet in subnets_list:
-            try:
-                sub_description = context.vpc_client.describe_subnets(
-                    SubnetIds=[subnet]
-                )["Subnets"]
-                if sub_description[0]["VpcId"] == self.id:
-                    return True
-            except ClientError:
-                pass
-
-        return False
+    def asg_in_vpc(self, asg, context: Context) -> bool:
+        # Plain dict lookups, unknown or deleted subnets simply do not match
+        vpc_by_subnet = context.subnet_vpc_ids
+        subnets_list = asg.get("VPCZoneIdentifier", "").split(",")
+        return any(vpc_by_subnet.get(s) == self.id for s in subnets_list)
 
     def describe_ekss(self, context: Context):
-        ekss = context.eks_client.list_clusters()["clusters"]
+        ekss = paginate(context.eks_client, "list_clusters", "clusters")
 
-        for eks in ekss:
-            eks_desc = context.eks_client.describe_cluster(name=eks)["cluster"]
+        def describe(name):
+            return context.eks_client.describe_cluster(name=name)["cluster"]
+
+        # There is no VPC filter, so describe every cluster side by side
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+            descriptions = list(ex.map(describe, ekss))
+
+        for eks_desc in descriptions:
             if eks_desc["resourcesVpcConfig"]["vpcId"] == self.id:
                 _id = eks_desc["arn"]
-                self._services[_id] = EksCluster(eks_desc, "EKS", _id)
+                self._add_service(_id, EksCluster, eks_desc, "EKS", _id)
 
                 # Add relations
                 for sn in eks_desc["resourcesVpcConfig"]["subnetIds"]:
-                    self.subnets[sn].append(_id)
+                    self._add_to_subnet(sn, _id)
                 for sg in eks_desc["resourcesVpcConfig"]["securityGroupIds"]:
                     self._add_relation(_id, sg)
 
     def describe_ec2s(self, context: Context):
         waiter = context.vpc_client.get_waiter("instance_terminated")
-        reservations = context.vpc_client.describe_instances(
-            Filters=[{"Name": "vpc-id", "Values": [self.id]}]
-        )["Reservations"]
-
-        # Get a list of ec2s
-        ec2s = [ec2 for reservation in reservations for ec2 in reservation["Instances"]]
+        ec2s = search(
+            context.vpc_client,
+            "describe_instances",
+            "Reservations[].Instances[]",
+            Filters=self._vpc_filter,
+        )
 
         for ec2 in ec2s:
             _id = ec2["InstanceId"]
-            self._services[_id] = EC2Instance(ec2, "EC2", _id, ec2["InstanceType"])
+            self._add_service(_id, EC2Instance, ec2, "EC2", _id, ec2["InstanceType"])
 
             # Add relations
             for nwi in ec2["NetworkInterfaces"]:
                 self._add_relation(_id, nwi["NetworkInterfaceId"])
             for sg in ec2["SecurityGroups"]:
                 self._add_relation(_id, sg["GroupId"])
-            self.subnets[ec2["SubnetId"]].append(_id)
-            self.azs[ec2["Placement"]["AvailabilityZone"]].service_ids.append(_id)
+            self._add_to_subnet(ec2["SubnetId"], _id)
+            self._add_to_az(ec2["Placement"]["AvailabilityZone"], _id)
 
     def describe_lambdas(self, context: Context):
-        lmbds = context.lambda_client.list_functions()["Functions"]
+        for lmbda in context.get_all_functions():
+            cfg = lmbda.get("VpcConfig")
+            if not cfg or cfg.get("VpcId") != self.id:
+                continue
 
-        lambdas_list = [
-            lmbd
-            for lmbd in lmbds
-            if "VpcConfig" in lmbd and lmbd["VpcConfig"]["VpcId"] == self.id
-        ]
-
-        for lmbda in lambdas_list:
             _id = lmbda["FunctionArn"]
-            self._services[_id] = LambdaFunction(lmbda, "Lambda", _id)
+            self._add_service(_id, LambdaFunction, lmbda, "Lambda", _id)
 
             # Add relations
-            for sn in lmbda["VpcConfig"]["SubnetIds"]:
-                self.subnets[sn].append(_id)
-            for sg in lmbda["VpcConfig"]["SecurityGroupIds"]:
+            for sn in cfg["SubnetIds"]:
+                self._add_to_subnet(sn, _id)
+            for sg in cfg["SecurityGroupIds"]:
                 self._add_relation(_id, sg)
 
     def describe_rdss(self, context: Context):
-        rdss = context.rds_client.describe_db_instances()["DBInstances"]
-
-        rdsss_list = [rds for rds in rdss if rds["DBSubnetGroup"]["VpcId"] == self.id]
+        rdss = search(
+            context.rds_client,
+            "describe_db_instances",
+            f"DBInstances[?DBSubnetGroup.VpcId=='{self.id}']",
+        )
 
-        for rds in rdsss_list:
+        for rds in rdss:
             _id = rds["DBInstanceIdentifier"]
-            self._services[_id] = RdsInstance(rds, "RDS", _id, rds["DBInstanceClass"])
+            self._add_service(_id, RdsInstance, rds, "RDS", _id, rds["DBInstanceClass"])
 
             # Add relations
             for sn in rds["DBSubnetGroup"]["Subnets"]:
-                self.subnets[sn["SubnetIdentifier"]].append(_id)
+                self._add_to_subnet(sn["SubnetIdentifier"], _id)
             for sg in rds["VpcSecurityGroups"]:
                 self._add_relation(_id, sg["VpcSecurityGroupId"])
-            self.azs[rds["AvailabilityZone"]].service_ids.append(_id)
+            self._add_to_az(rds["AvailabilityZone"], _id)
 
     def describe_elbs(self, context: Context):
-        elbs = context.elb_client.describe_load_balancers()["LoadBalancerDescriptions"]
+        elbs = search(
+            context.elb_client,
+            "describe_load_balancers",
+            f"LoadBalancerDescriptions[?VPCId=='{self.id}']",
+        )
 
-        for elb in filter(lambda x: x["VPCId"] == self.id, elbs):
+        for elb in elbs:
             _id = elb["LoadBalancerName"]
-            self._services[_id] = LoadBalancer(elb, "ELBv1", _id)
+            self._add_service(_id, LoadBalancer, elb, "ELBv1", _id)
 
             # Add relations
             for sn in elb["Subnets"]:
-                self.subnets[sn].append(_id)
+                self._add_to_subnet(sn, _id)
             for sg in elb["SecurityGroups"]:
                 self._add_relation(_id, sg)
             for x in elb["Instances"]:
                 self._add_relation(_id, x["InstanceId"])
             for az in elb["AvailabilityZones"]:
-                self.azs[az].service_ids.append(_id)
+                self._add_to_az(az, _id)
 
     def describe_elbsV2(self, context: Context):
-        elbs = context.elbV2_client.describe_load_balancers()["LoadBalancers"]
+        elbs = search(
+            context.elbV2_client,
+            "describe_load_balancers",
+            f"LoadBalancers[?VpcId=='{self.id}']",
+        )
+        elbs = list(elbs)
+
+        # Only the target groups in this VPC
+        tgs_by_lb = {
+            elb["LoadBalancerArn"]: [
+                tg
+                for tg in context.target_groups_by_lb.get(elb["LoadBalancerArn"], [])
+                if tg["VpcId"] == self.id
+            ]
+            for elb in elbs
+        }
+
+        # Ask for the targets of each target group side by side
+        tg_ids = list(
+            {tg["TargetGroupArn"] for tgs in tgs_by_lb.values() for tg in tgs}
+        )
+
+        # Along with the hosted zones that have not been seen yet
+        hz_ids = [
+            hz_id
+            for hz_id in {elb.get("CanonicalHostedZoneId") for elb in elbs}
+            if hz_id and hz_id not in self._services
+        ]
 
-        for elb in filter(lambda x: x["VpcId"] == self.id, elbs):
+        def describe_health(tg_id):
+            return context.elbV2_client.describe_target_health(TargetGroupArn=tg_id)[
+                "TargetHealthDescriptions"
+            ]
+
+        def describe_zone(hz_id):
+            try:
+                return context.route53.get_hosted_zone(Id=hz_id)["HostedZone"]
+            except ClientError:
+                return {"Name": hz_id}
+
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+            targets = ex.map(describe_health, tg_ids)
+            zones = ex.map(describe_zone, hz_ids)
+            targets_by_tg = dict(zip(tg_ids, targets))
+            zones_by_id = dict(zip(hz_ids, zones))
+
+        for elb in elbs:
             _id = elb["LoadBalancerArn"]
-            self._services[_id] = LoadBalancer(elb, "ELBv2", elb["LoadBalancerArn"])
+            self._add_service(_id, LoadBalancer, elb, "ELBv2", _id)
 
             # Add relations
             for az in elb["AvailabilityZones"]:
-                self.subnets[az["SubnetId"]].append(_id)
-                self.azs[az["ZoneName"]].service_ids.append(_id)
+                self._add_to_subnet(az["SubnetId"], _id)
+                self._add_to_az(az["ZoneName"], _id)
             for sg in elb.get("SecurityGroups", []):
                 self._add_relation(_id, sg)
 
-            hz_id = elb["CanonicalHostedZoneId"]
-            try:
-                hz = context.route53.get_hosted_zone(Id=hz_id)["HostedZone"]
-            except:
-                hz = {"Name": hz_id}
-            self._services[hz_id] = HostedZone(hz, "HZ", hz_id)
-            self._add_relation(hz_id, _id)
+            hz_id = elb.get("CanonicalHostedZoneId")
+            if hz_id:
+                hz = zones_by_id.get(hz_id, {"Name": hz_id})
+                self._add_service(hz_id, HostedZone, hz, "HZ", hz_id)
+                self._add_relation(hz_id, _id)
 
             # Add target groups
-            tgs = context.elbV2_client.describe_target_groups(LoadBalancerArn=_id)[
-                "TargetGroups"
-            ]
-
-            for tg in tgs:
+            for tg in tgs_by_lb[_id]:
                 _tg_id = tg["TargetGroupArn"]
-
-                if tg["VpcId"] != self.id:
-                    logger.warn("Skipping %s. Not in same VPC", _tg_id)
-                    continue
-
-                self._services[_tg_id] = TargetGroup(tg, "TG", _tg_id)
+                self._add_service(_tg_id, TargetGroup, tg, "TG", _tg_id)
 
                 # This Target group belongs to this Load Balancer
                 self._add_relation(_id, _tg_id)
 
                 # Get the relations
-                targets = context.elbV2_client.describe_target_health(
-                    TargetGroupArn=_tg_id
-                )["TargetHealthDescriptions"]
-
-                for target in targets:
+                for target in targets_by_tg[_tg_id]:
                     self._add_relation(_tg_id, target["Target"]["Id"])
 
     def describe_nats(self, context: Context):
-        nats = context.vpc_client.describe_nat_gateways(
-            Filters=[{"Name": "vpc-id", "Values": [self.id]}]
-        )["NatGateways"]
+        nats = paginate(
+            context.vpc_client,
+            "describe_nat_gateways",
+            "NatGateways",
+            Filters=self._vpc_filter,
+        )
 
         for nat in nats:
             _id = nat["NatGatewayId"]
-            self._services[_id] = NatGateway(nat, "NAT", _id)
+            self._add_service(_id, NatGateway, nat, "NAT", _id)
 
             # Add relations
-            self.subnets[nat["SubnetId"]].append(_id)
+            self._add_to_subnet(nat["SubnetId"], _id)
             for nwi in nat["NatGatewayAddresses"]:
                 self._add_relation(_id, nwi["NetworkInterfaceId"])
 
     def describe_enis(self, context: Context):
-        enis = context.vpc_client.describe_network_interfaces(
-            Filters=[{"Name": "vpc-id", "Values": [self.id]}]
-        )["NetworkInterfaces"]
+        enis = paginate(
+            context.vpc_client,
+            "describe_network_interfaces",
+            "NetworkInterfaces",
+            Filters=self._vpc_filter,
+        )
 
         for eni in enis:
             _id = eni["NetworkInterfaceId"]
-            self._services[_id] = NetworkInterface(eni, "ENI", _id)
+            self._add_service(_id, NetworkInterface, eni, "ENI", _id)
 
             # Add relations
-            self.subnets[eni["SubnetId"]].append(_id)
+            self._add_to_subnet(eni["SubnetId"], _id)
 
     def describe_igws(self, context: Context):
         """
         Describe the internet gateway
         """
-        igws = context.vpc_client.describe_internet_gateways(
-            Filters=[{"Name": "attachment.vpc-id", "Values": [self.id]}]
-        )["InternetGateways"]
+        igws = paginate(
+            context.vpc_client,
+            "describe_internet_gateways",
+            "InternetGateways",
+            Filters=self._attachment_filter,
+        )
 
         for igw in igws:
             _id = igw["InternetGatewayId"]
-            self._services[_id] = ServiceInstance(igw, "IGW", _id)
+            self._add_service(_id, ServiceInstance, igw, "IGW", _id)
 
     def describe_vpgws(self, context: Context):
         """
@@ -286,82 +380,89 @@ class VPC(object):
 
         # Get list of dicts
         vpgws = context.vpc_client.describe_vpn_gateways(
-            Filters=[{"Name": "attachment.vpc-id", "Values": [self.id]}]
+            Filters=self._attachment_filter
         )["VpnGateways"]
 
         for vpgw in vpgws:
             _id = vpgw["VpnGatewayId"]
-            self._services[_id] = ServiceInstance(vpgw, "VPGW", _id)
+            self._add_service(_id, ServiceInstance, vpgw, "VPGW", _id)
 
             # Add relations
             if "AvailabilityZone" in vpgw:
-                self.azs[vpgw["AvailabilityZone"]].services.append(_id)
+                self._add_to_az(vpgw["AvailabilityZone"], _id)
 
     def describe_subnets(self, context: Context):
         # Get list of dicts of metadata
-        subnets = context.vpc_client.describe_subnets(
-            Filters=[{"Name": "vpc-id", "Values": [self.id]}]
-        )["Subnets"]
+        subnets = [s for s in context.get_all_subnets() if s["VpcId"] == self.id]
 
         for subnet in subnets:
             _id = subnet["SubnetId"]
-            self._services[_id] = Subnet(subnet, "SUBN", _id)
+            self._add_service(_id, Subnet, subnet, "SUBN", _id)
 
             # Add relations
-            self.azs[subnet["AvailabilityZone"]].subnet_ids.append(_id)
+            self._add_subnet_to_az(subnet["AvailabilityZone"], _id)
 
     def describe_acls(self, context: Context):
-        acls = context.vpc_client.describe_network_acls(
-            Filters=[{"Name": "vpc-id", "Values": [self.id]}]
-        )["NetworkAcls"]
+        acls = paginate(
+            context.vpc_client,
+            "describe_network_acls",
+            "NetworkAcls",
+            Filters=self._vpc_filter,
+        )
 
         for acl in acls:
             _id = acl["NetworkAclId"]
-            self._services[_id] = ServiceInstance(acl, "ACL", _id)
+            self._add_service(_id, ServiceInstance, acl, "ACL", _id)
 
             # Add relations
             for sn in acl["Associations"]:
                 self._add_relation(sn["SubnetId"], _id)
 
     def describe_sgs(self, context: Context):
-        sgs = context.vpc_client.describe_security_groups(
-            Filters=[{"Name": "vpc-id", "Values": [self.id]}]
-        )["SecurityGroups"]
+        sgs = [
+            s for s in context.get_all_security_groups() if s.get("VpcId") == self.id
+        ]
 
         for sg in sgs:
             _id = sg["GroupId"]
-            _instance = SecurityGroup(sg, "SG", _id)
-            self._services[_id] = _instance
+            _instance = self._add_service(_id, SecurityGroup, sg, "SG", _id)
 
             # Add relations
             for src, trg in _instance.relationships:
                 self._add_relation(src, trg)
 
     def describe_rtbs(self, context: Context):
-        rtbs = context.vpc_client.describe_route_tables(
-            Filters=[{"Name": "vpc-id", "Values": [self.id]}]
-        )["RouteTables"]
+        rtbs = paginate(
+            context.vpc_client,
+            "describe_route_tables",
+            "RouteTables",
+            Filters=self._vpc_filter,
+        )
 
         for rtb in rtbs:
             _id = rtb["RouteTableId"]
-            self._services[_id] = ServiceInstance(rtb, "RTB", _id)
-
-            # Add relations
-            for assoc in rtb["Associations"]:
-                self._add_relation(assoc.get("SubnetId"), _id)
-                self._add_relation(_id, assoc.get("GatewayId"))
-
-            # Add relations
-            for route in rtb["Routes"]:
-                self._add_relation(_id, route.get("EgressOnlyInternetGatewayId"))
-                self._add_relation(route.get("GatewayId"), _id)
-                self._add_relation(_id, route.get("InstanceId"))
-                self._add_relation(_id, route.get("NatGatewayId"))
-                self._add_relation(_id, route.get("TransitGatewayId"))
-                self._add_relation(_id, route.get("LocalGatewayId"))
-                self._add_relation(_id, route.get("CarrierGatewayId"))
-                self._add_relation(_id, route.get("NetworkInterfaceId"))
-                self._add_relation(_id, route.get("VpcPeeringConnectionId"))
+            self._add_service(_id, ServiceInstance, rtb, "RTB", _id)
+
+            # Add relations, one lock for the whole table
+            with self._lock:
+                adj = self._adj
+                for assoc in rtb["Associations"]:
+                    subnet = assoc.get("SubnetId")
+                    if subnet:
+                        adj[subnet].add(_id)
+                    gateway = assoc.get("GatewayId")
+                    if gateway:
+                        adj[_id].add(gateway)
+
+                for route in rtb["Routes"]:
+                    for k in ROUTE_KEYS_IN:
+                        v = route.get(k)
+                        if v:
+                            adj[v].add(_id)
+                    for k in ROUTE_KEYS_OUT:
+                        v = route.get(k)
+                        if v:
+                            adj[_id].add(v)
 
     def describe_hosted_zones(self, context: Context):
         hzs = context.route53.list_hosted_zones_by_vpc(
@@ -370,7 +471,8 @@ class VPC(object):
 
         for hz in hzs:
             _id = hz["HostedZoneId"]
-            self._services[_id] = HostedZone(hz, "HZ", _id)
+            # describe_elbsV2 can reach the same zone, the VPC's own listing wins
+            self._set_service(_id, HostedZone(hz, "HZ", _id))
 
     # HZ Record Sets
     # https://stackoverflow.com/questions/41716586/aws-route-53-listing-cname-records-using-boto3
@@ -379,17 +481,20 @@ class VPC(object):
     #    - CanonicalHostedZoneId
 
     def describe_vpc_epts(self, context: Context):
-        epts = context.vpc_client.describe_vpc_endpoints(
-            Filters=[{"Name": "vpc-id", "Values": [self.id]}]
-        )["VpcEndpoints"]
+        epts = paginate(
+            context.vpc_client,
+            "describe_vpc_endpoints",
+            "VpcEndpoints",
+            Filters=self._vpc_filter,
+        )
 
         for ept in epts:
             _id = ept["VpcEndpointId"]
-            self._services[_id] = VpcEndpoint.create(ept, _id)
+            self._add_service(_id, VpcEndpoint.create, ept, _id)
 
             # Add relations
             for sn in ept["SubnetIds"]:
-                self.subnets[sn].append(_id)
+                self._add_to_subnet(sn, _id)
             for sg in ept["Groups"]:
                 self._add_relation(_id, sg["GroupId"])
             for rtb in ept["RouteTableIds"]:
@@ -398,21 +503,45 @@ class VPC(object):
                 self._add_relation(_id, nwi)
 
     def describe_vpc_peering_connections(self, context: Context):
-        accepters = context.vpc_client.describe_vpc_peering_connections(
-            Filters=[{"Name": "accepter-vpc-info.vpc-id", "Values": [self.id]}]
-        )["VpcPeeringConnections"]
-
-        for peering in accepters:
-            _id = peering["VpcPeeringConnectionId"]
-            self._services[_id] = ServiceInstance(peering, "PEER", _id)
-
-        requesters = context.vpc_client.describe_vpc_peering_connections(
-            Filters=[{"Name": "requester-vpc-info.vpc-id", "Values": [self.id]}]
-        )["VpcPeeringConnections"]
-
-        for peering in requesters:
-            _id = peering["VpcPeeringConnectionId"]
-            self._services[_id] = ServiceInstance(peering, "PEER", _id)
+        # EC2 ANDs filters together, so this VPC's side of the peering needs
+        # one query per role
+        def describe(role):
+            return paginate(
+                context.vpc_client,
+                "describe_vpc_peering_connections",
+                "VpcPeeringConnections",
+                Filters=[{"Name": f"{role}-vpc-info.vpc-id", "Values": [self.id]}],
+            )
+
+        with ThreadPoolExecutor(max_workers=2) as ex:
+            accepters, requesters = ex.map(describe, ["accepter", "requester"])
+
+        peerings = {p["VpcPeeringConnectionId"]: p for p in accepters + requesters}
+
+        for _id, peering in peerings.items():
+            self._add_service(_id, ServiceInstance, peering, "PEER", _id)
+
+    # (name, describe, group), "free" ones are skipped by --ignore-free-resources
+    _DESCRIBERS = (
+        ("asgs", describe_asgs, "always"),
+        ("ec2s", describe_ec2s, "always"),
+        ("ekss", describe_ekss, "always"),
+        ("elbs", describe_elbs, "always"),
+        ("elbsV2", describe_elbsV2, "always"),
+        ("enis", describe_enis, "always"),
+        ("hosted_zones", describe_hosted_zones, "always"),
+        ("igws", describe_igws, "always"),
+        ("lambdas", describe_lambdas, "always"),
+        ("nats", describe_nats, "always"),
+        ("rdss", describe_rdss, "always"),
+        ("subnets", describe_subnets, "always"),
+        ("vpc_epts", describe_vpc_epts, "always"),
+        ("vpgws", describe_vpgws, "always"),
+        ("vpc_peering_connections", describe_vpc_peering_connections, "always"),
+        ("acls", describe_acls, "free"),
+        ("rtbs", describe_rtbs, "free"),
+        ("sgs", describe_sgs, "free"),
+    )
 
     # ----------------------------------------------------------------------------
 
@@ -420,39 +549,46 @@ class VPC(object):
         return sum([svc.cost_per_month for svc in self._services.values()])
 
     def scan(self, context: Context):
-        self.details = context.vpc_client.describe_vpcs(VpcIds=[self.id])["Vpcs"][0]
+        known = [v for v in context.get_all_vpcs() if v["VpcId"] == self.id]
+        if known:
+            self.details = known[0]
+        else:
+            vpcs = context.vpc_client.describe_vpcs(VpcIds=[self.id])["Vpcs"]
+            self.details = vpcs[0]
 
         self.cidr_block = self.details["CidrBlock"]
 
         # Get the Name for the VPC
-        tags = {t["Key"]: t["Value"] for t in self.details.get("Tags", [])}
-        self.name = tags.get("Name", self.id)
-
-        self.describe_asgs(context)
-        self.describe_ec2s(context)
-        self.describe_ekss(context)
-        self.describe_elbs(context)
-        self.describe_elbsV2(context)
-        self.describe_enis(context)
-        self.describe_hosted_zones(context)
-        self.describe_igws(context)
-        self.describe_lambdas(context)
-        self.describe_nats(context)
-        self.describe_rdss(context)
-        self.describe_subnets(context)
-        self.describe_vpc_epts(context)
-        self.describe_vpgws(context)
-        self.describe_vpc_peering_connections(context)
-
-        if not context.options.ignore_free_resources:
-            self.describe_acls(context)
-            self.describe_rtbs(context)
-            self.describe_sgs(context)
+        tags = self.details.get("Tags", [])
+        self.name = next((t["Value"] for t in tags if t["Key"] == "Name"), self.id)
+
+        skip_free = context.options.ignore_free_resources
+        describes = [
+            (name, fn)
+            for name, fn, group in self._DESCRIBERS
+            if group == "always" or not skip_free
+        ]
+
+        # Each describe is waiting on AWS, so overlap them
+        with ThreadPoolExecutor(max_workers=min(len(describes), MAX_WORKERS)) as ex:
+            futures = [(name, ex.submit(fn, self, context)) for name, fn in describes]
+
+        # Completion order varies between runs, keep the output stable, even
+        # for the partial results of a failed scan
+        self._services = dict(
+            sorted(self._services.items(), key=lambda kv: (kv[1].service_name, kv[0]))
+        )
+
+        for name, future in futures:
+            try:
+                future.result()
+            except Exception:
+                logger.error("Describing %s failed for %s", name, self.id)
+                raise
 
         # dhcpOpts https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.describe_dhcp_optionscontext
         # Volume
 
     def to_csv(self, prefix, stream):
         fwd = f"{prefix}{self.name}\t"
-        for svc_inst in self._services.values():
-            svc_inst.to_csv(fwd, stream)
+        stream.writelines([svc.csv_row(fwd) for svc in self._services.values()])